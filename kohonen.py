@@ -13,15 +13,215 @@ from __future__ import division
 
 import math
 import os
+import queue
+import threading
 
 # Librairie de calcul matriciel
 import numpy
 # Librairie d'affichage
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+# Compilation à la volée des noyaux de calcul (optionnelle)
+try:
+    from numba import njit, prange
+    NUMBA = True
+except ImportError:
+    NUMBA = False
+
+    def njit(*args, **kwargs):
+        return lambda f: f
+
+    prange = range
+# Calcul des distances entre deux ensembles de points par des bibliothèques optimisées (optionnelles)
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+try:
+    from scipy.spatial.distance import cdist
+except ImportError:
+    cdist = None
+
+
+def _sqdist(A, B):
+    '''
+    @summary: Distance au carré entre chaque ligne de A et chaque ligne de B (avec simsimd, sinon scipy, sinon numpy)
+    @param A: premier ensemble de points, de taille (n, d)
+    @type A: numpy array
+    @param B: second ensemble de points, de taille (m, d)
+    @type B: numpy array
+    @return: tableau des distances au carré de taille (n, m)
+    '''
+    # Les deux ensembles sont convertis dans le type commun, sans perte de précision
+    dtype = numpy.result_type(A, B)
+    A = numpy.ascontiguousarray(A, dtype=dtype)
+    B = numpy.ascontiguousarray(B, dtype=dtype)
+    if simsimd is not None:
+        return numpy.asarray(simsimd.cdist(A, B, metric='sqeuclidean'))
+    if cdist is not None:
+        return cdist(A, B, 'sqeuclidean')
+    diff = A[:, None, :] - B[None, :, :]
+    return numpy.einsum('nmk,nmk->nm', diff, diff)
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def _apply_update_row(W, i, bmux, bmuy, eta, lut, x):
+    '''
+    @summary: Noyau compilé de la règle de Kohonen appliquée aux neurones d'une ligne de la carte (modifie W en place)
+    @param W: tenseur des poids de la carte
+    @type W: numpy array
+    @param i: indice de la ligne de la carte
+    @type i: int
+    @param bmux: position en x du neurone gagnant
+    @type bmux: int
+    @param bmuy: position en y du neurone gagnant
+    @type bmuy: int
+    @param eta: taux d'apprentissage
+    @type eta: float
+    @param lut: valeurs de la fonction de voisinage indexées par la distance au neurone gagnant
+    @type lut: numpy array
+    @param x: entrée de la carte
+    @type x: numpy array
+    '''
+    for j in range(W.shape[1]):
+        h = eta * lut[abs(i - bmux) + abs(j - bmuy)]
+        for k in range(W.shape[2]):
+            W[i, j, k] += h * (x[k] - W[i, j, k])
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def _apply_update(W, bmux, bmuy, eta, lut, x):
+    '''
+    @summary: Noyau compilé (séquentiel) de la règle de Kohonen appliquée à tous les neurones de la carte (modifie W en place)
+    @param W: tenseur des poids de la carte
+    @type W: numpy array
+    @param bmux: position en x du neurone gagnant
+    @type bmux: int
+    @param bmuy: position en y du neurone gagnant
+    @type bmuy: int
+    @param eta: taux d'apprentissage
+    @type eta: float
+    @param lut: valeurs de la fonction de voisinage indexées par la distance au neurone gagnant
+    @type lut: numpy array
+    @param x: entrée de la carte
+    @type x: numpy array
+    '''
+    for i in range(W.shape[0]):
+        _apply_update_row(W, i, bmux, bmuy, eta, lut, x)
+
+
+@njit(parallel=True, fastmath=True, cache=True, nogil=True)
+def _som_learn(W, bmux, bmuy, eta, lut, x):
+    '''
+    @summary: Noyau compilé de la règle de Kohonen appliquée à tous les neurones de la carte, les lignes étant réparties entre les coeurs (modifie W en place)
+    @param W: tenseur des poids de la carte
+    @type W: numpy array
+    @param bmux: position en x du neurone gagnant
+    @type bmux: int
+    @param bmuy: position en y du neurone gagnant
+    @type bmuy: int
+    @param eta: taux d'apprentissage
+    @type eta: float
+    @param lut: valeurs de la fonction de voisinage indexées par la distance au neurone gagnant
+    @type lut: numpy array
+    @param x: entrée de la carte
+    @type x: numpy array
+    '''
+    for i in prange(W.shape[0]):
+        _apply_update_row(W, i, bmux, bmuy, eta, lut, x)
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def _compute_bmu(W, x):
+    '''
+    @summary: Noyau compilé de recherche du neurone gagnant (calcul des distances et du minimum en une seule passe sur les poids)
+    @param W: tenseur des poids de la carte
+    @type W: numpy array
+    @param x: entrée de la carte
+    @type x: numpy array
+    @return: position en x et en y du neurone gagnant et distance au carré entre son poids et l'entrée
+    '''
+    best = 1e300
+    bi = 0
+    bj = 0
+    for i in range(W.shape[0]):
+        for j in range(W.shape[1]):
+            s = 0.
+            for k in range(W.shape[2]):
+                d = W[i, j, k] - x[k]
+                s += d * d
+            if s < best:
+                best = s
+                bi = i
+                bj = j
+    return bi, bj, best
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def _som_train(W, X, idxs, eta, lut):
+    '''
+    @summary: Noyau compilé de l'apprentissage en ligne sur une suite de pas de temps (modifie W en place)
+    @param W: tenseur des poids de la carte
+    @type W: numpy array
+    @param X: exemples aplatis
+    @type X: numpy array
+    @param idxs: indice de l'exemple présenté à chaque pas de temps
+    @type idxs: numpy array
+    @param eta: taux d'apprentissage
+    @type eta: float
+    @param lut: valeurs de la fonction de voisinage indexées par la distance au neurone gagnant
+    @type lut: numpy array
+    '''
+    for t in range(idxs.shape[0]):
+        x = X[idxs[t]]
+        # Recherche du neurone gagnant
+        bmux, bmuy, _ = _compute_bmu(W, x)
+        # Mise à jour des poids de chaque neurone
+        _apply_update(W, bmux, bmuy, eta, lut, x)
+
+
+def draw_weights_2(axes, w):
+    '''
+    @summary: Affichage de poids dans l'espace d'entrée en 2 fois 2d (dans le cas d'entrée à quatre dimensions et d'une carte avec une topologie de grille carrée)
+    @param axes: paire de sous graphiques dans lesquels afficher les poids
+    @type axes: tuple
+    @param w: tenseur des poids de la carte
+    @type w: numpy array
+    '''
+    # Affichage des 2 premières dimensions dans le plan, puis des 2 dernières
+    for ax, (dx, dy) in zip(axes, ((0, 1), (2, 3))):
+        # Affichage des poids
+        ax.scatter(w[:, :, dx].flatten(), w[:, :, dy].flatten(), c='k')
+        # Affichage de la grille
+        for i in range(w.shape[0]):
+            ax.plot(w[i, :, dx], w[i, :, dy], 'k', linewidth=1.)
+        for i in range(w.shape[1]):
+            ax.plot(w[:, i, dx], w[:, i, dy], 'k', linewidth=1.)
+    # Affichage du titre de la figure
+    axes[0].figure.suptitle('Poids dans l\'espace d\'entree')
+
+
+def save_weights_2(w, filename):
+    '''
+    @summary: Enregistrement dans un fichier de l'affichage de poids en 2 fois 2d, sans passer par pyplot (utilisable depuis un autre fil d'exécution)
+    @param w: tenseur des poids de la carte
+    @type w: numpy array
+    @param filename: nom du fichier image
+    @type filename: str
+    '''
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    draw_weights_2(fig.subplots(1, 2), w)
+    fig.savefig(filename)
 
 
 class Neuron:
-    ''' Classe représentant un neurone '''
+    '''
+    Classe représentant un neurone
+    @deprecated: la carte n'utilise plus de neurones pour ses calculs, seulement le tenseur SOM.weights_array ;
+    cette classe ne sert plus qu'à la compatibilité de SOM.map
+    '''
 
     def __init__(self, w, posx, posy):
         '''
@@ -83,40 +283,91 @@ class SOM:
         self.inputsize = inputsize
         # Initialisation de la taille de la carte
         self.gridsize = gridsize
+        # Tenseur contigu des poids de tous les neurones, de taille (gx, gy, taille de l'entrée aplatie)
+        # (en simple précision pour réduire de moitié la mémoire parcourue à chaque pas de temps)
+        self.weights_array = numpy.random.random((gridsize[0], gridsize[1], int(numpy.prod(inputsize)))).astype(numpy.float32)
+        # Tampon réutilisé pour le calcul des différences entre l'entrée et les poids
+        self._diff_buf = numpy.empty_like(self.weights_array)
+        # Positions des neurones selon chaque axe de la carte (pour le calcul vectorisé du voisinage)
+        self._posx = numpy.arange(gridsize[0])[:, None]
+        self._posy = numpy.arange(gridsize[1])[None, :]
+        # Tampons réutilisés pour la distance au neurone gagnant et la fonction de voisinage
+        self._d = numpy.empty(gridsize, dtype=numpy.intp)
+        self._h = numpy.empty(gridsize, dtype=self.weights_array.dtype)
+        # Dernière table de la fonction de voisinage calculée et largeur du voisinage correspondante
+        self._lut = None
+        self._lut_sigma = None
+        # Carte de neurones, construite à la première demande (voir SOM.map)
+        self._map = None
         # Création de la carte
-        # Carte de neurones
-        self.map = []
-        # Carte des poids
-        self.weightsmap = []
         # Carte des activités
-        self.activitymap = []
-        for posx in range(gridsize[0]):
-            mline = []
-            wmline = []
-            amline = []
-            for posy in range(gridsize[1]):
-                neuron = Neuron(numpy.random.random(self.inputsize), posx, posy)
-                mline.append(neuron)
-                wmline.append(neuron.weights)
-                amline.append(neuron.y)
-            self.map.append(mline)
-            self.weightsmap.append(wmline)
-            self.activitymap.append(amline)
-        self.activitymap = numpy.array(self.activitymap)
+        self.activitymap = numpy.zeros(gridsize, dtype=self.weights_array.dtype)
+
+    @property
+    def map(self):
+        '''
+    @summary: Carte de neurones, construite à la première demande puis conservée (les poids de chaque neurone sont une vue sur le tenseur des poids, qui n'est modifié qu'en place)
+    @deprecated: utiliser directement weights_array
+    '''
+        if self._map is None:
+            self._map = []
+            for posx in range(self.gridsize[0]):
+                mline = []
+                for posy in range(self.gridsize[1]):
+                    neuron = Neuron(self.weights_array[posx, posy], posx, posy)
+                    # Les poids du neurone deviennent une vue sur le tenseur des poids
+                    neuron.weights = self.weights_array[posx, posy]
+                    mline.append(neuron)
+                self._map.append(mline)
+        return self._map
+
+    @property
+    def weightsmap(self):
+        '''
+    @summary: Carte des poids (le tenseur des poids lui-même, sans copie)
+    '''
+        return self.weights_array
 
     def compute(self, x):
         '''
-    @summary: calcule de l'activité des neurones de la carte
+    @summary: calcule de l'activité des neurones de la carte (la distance au carré entre l'entrée et leur poids, la racine étant inutile à la recherche du minimum)
     @param x: entrée de la carte (identique pour chaque neurone)
     @type x: numpy array
     '''
-        # On demande à chaque neurone de calculer son activité et on met à jour la carte d'activité de la carte
-        for posx in range(self.gridsize[0]):
-            for posy in range(self.gridsize[1]):
-                self.map[posx][posy].compute(x)
-                self.activitymap[posx][posy] = self.map[posx][posy].y
+        x = x.astype(self.weights_array.dtype, copy=False)
+        # Calcul vectorisé de la distance entre l'entrée et le poids de chaque neurone de la carte
+        numpy.subtract(self.weights_array, x, out=self._diff_buf)
+        numpy.einsum('ijk,ijk->ij', self._diff_buf, self._diff_buf, out=self.activitymap)
 
-    def learn(self, eta, sigma, x):
+    def compute_bmu(self, x):
+        '''
+    @summary: Recherche du neurone gagnant sans construire la carte d'activité lorsque numba est disponible
+    @param x: entrée de la carte
+    @type x: numpy array
+    @return: position en x et en y du neurone gagnant
+    '''
+        x = x.astype(self.weights_array.dtype, copy=False)
+        if NUMBA:
+            bmux, bmuy, _ = _compute_bmu(self.weights_array, x)
+            return bmux, bmuy
+        # Sinon on passe par la carte d'activité
+        self.compute(x)
+        return numpy.unravel_index(numpy.argmin(self.activitymap), self.gridsize)
+
+    def neighborhood_table(self, sigma):
+        '''
+    @summary: Calcul de la fonction de voisinage gaussienne pour chaque distance (de Manhattan) possible dans la carte
+    @param sigma: largeur du voisinage
+    @type sigma: float
+    @return: table des valeurs de la fonction de voisinage indexée par la distance (conservée tant que sigma ne change pas)
+    '''
+        if sigma != self._lut_sigma:
+            d = numpy.arange(self.gridsize[0] + self.gridsize[1] - 1)
+            self._lut = numpy.exp(-(d * d) * (0.5 / (sigma * sigma))).astype(self.weights_array.dtype)
+            self._lut_sigma = sigma
+        return self._lut
+
+    def learn(self, eta, sigma, x, bmu=None):
         '''
     @summary: Modifie les poids de la carte selon la règle de Kohonen
     @param eta: taux d'apprentissage
@@ -125,13 +376,77 @@ class SOM:
     @type sigma: float
     @param x: entrée de la carte
     @type x: numpy array
+    @param bmu: position du neurone gagnant (si None, elle est déduite de la carte d'activité)
+    @type bmu: tuple
     '''
         # Calcul du neurone vainqueur
-        bmux, bmuy = numpy.unravel_index(numpy.argmin(self.activitymap), self.gridsize)
-        # Mise à jour des poids de chaque neurone
-        for posx in range(self.gridsize[0]):
-            for posy in range(self.gridsize[1]):
-                self.map[posx][posy].learn(eta, sigma, bmux, bmuy, x)
+        if bmu is None:
+            bmu = numpy.unravel_index(numpy.argmin(self.activitymap), self.gridsize)
+        bmux, bmuy = bmu
+        x = x.astype(self.weights_array.dtype, copy=False)
+        # Mise à jour des poids par le noyau compilé si numba est disponible
+        if NUMBA:
+            _som_learn(self.weights_array, int(bmux), int(bmuy), eta, self.neighborhood_table(sigma), x)
+            return
+        # Distance (de Manhattan) de chaque neurone au neurone vainqueur dans la carte
+        numpy.add(numpy.abs(self._posx - bmux), numpy.abs(self._posy - bmuy), out=self._d)
+        # Fonction de voisinage gaussienne, multipliée par le taux d'apprentissage
+        numpy.take(self.neighborhood_table(sigma), self._d, out=self._h)
+        self._h *= eta
+        # Mise à jour des poids de tous les neurones en une seule opération (dans les tampons préalloués)
+        numpy.subtract(x, self.weights_array, out=self._diff_buf)
+        self._diff_buf *= self._h[..., None]
+        self.weights_array += self._diff_buf
+
+    def learn_batch(self, eta, sigma, Xb):
+        '''
+    @summary: Modifie les poids de la carte selon la règle de Kohonen moyennée sur un mini-lot d'entrées
+    @param eta: taux d'apprentissage
+    @type eta: float
+    @param sigma: largeur du voisinage
+    @type sigma: float
+    @param Xb: mini-lot d'entrées de la carte
+    @type Xb: numpy array
+    '''
+        # On récupère la taille du mini-lot et on aplatit chaque entrée
+        nbatch = Xb.shape[0]
+        Xb = Xb.reshape(nbatch, -1).astype(self.weights_array.dtype, copy=False)
+        # Distance au carré de chaque entrée à chaque poids de neurone
+        diffs = self.weights_array[None, :, :, :] - Xb[:, None, None, :]
+        d2 = numpy.einsum('nijk,nijk->nij', diffs, diffs)
+        # Calcul du neurone vainqueur pour chaque entrée
+        bmux, bmuy = numpy.unravel_index(d2.reshape(nbatch, -1).argmin(axis=1), self.gridsize)
+        # Distance (de Manhattan) de chaque neurone au neurone vainqueur de chaque entrée
+        d = numpy.abs(self._posx - bmux[:, None, None]) + numpy.abs(self._posy - bmuy[:, None, None])
+        # Fonction de voisinage gaussienne
+        h = self.neighborhood_table(sigma)[d]
+        # Mise à jour des poids par la moyenne des mises à jour de chaque entrée
+        self.weights_array -= (eta / nbatch) * numpy.einsum('nij,nijk->ijk', h, diffs)
+
+    def train(self, X, idxs, eta, sigma):
+        '''
+    @summary: Apprentissage de la carte sur une suite de pas de temps (entièrement dans un noyau compilé lorsque numba est disponible et que l'apprentissage est en ligne)
+    @param X: exemples aplatis
+    @type X: numpy array
+    @param idxs: indices des exemples présentés à chaque pas de temps, de taille (nombre de pas de temps, taille des mini-lots)
+    @type idxs: numpy array
+    @param eta: taux d'apprentissage
+    @type eta: float
+    @param sigma: largeur du voisinage
+    @type sigma: float
+    '''
+        X = X.astype(self.weights_array.dtype, copy=False)
+        # Apprentissage par mini-lots
+        if idxs.shape[1] > 1:
+            for batch in idxs:
+                self.learn_batch(eta, sigma, X[batch])
+        # Apprentissage en ligne
+        elif NUMBA:
+            _som_train(self.weights_array, X, idxs[:, 0], eta, self.neighborhood_table(sigma))
+        else:
+            for index in idxs[:, 0]:
+                x = X[index]
+                self.learn(eta, sigma, x, self.compute_bmu(x))
 
     def scatter_plot(self, interactive=False):
         '''
@@ -143,7 +458,7 @@ class SOM:
         if not interactive:
             plt.figure()
         # Récupération des poids
-        w = numpy.array(self.weightsmap)
+        w = self.weights_array
         # Affichage des poids
         plt.scatter(w[:, :, 0].flatten(), w[:, :, 1].flatten(), c='k')
         # Affichage de la grille
@@ -160,39 +475,21 @@ class SOM:
         if not interactive:
             plt.show()
 
-    def scatter_plot_2(self, interactive=False):
+    def scatter_plot_2(self, interactive=False, axes=None):
         '''
     @summary: Affichage du réseau dans l'espace d'entrée en 2 fois 2d (utilisable dans le cas d'entrée à quatre dimensions et d'une carte avec une topologie de grille carrée)
     @param interactive: Indique si l'affichage se fait en mode interactif
     @type interactive: boolean
+    @param axes: paire de sous graphiques dans lesquels afficher le réseau (si None, ils sont créés dans la figure courante)
+    @type axes: tuple
     '''
-        # Création de la figure
-        if not interactive:
-            plt.figure(figsize=(10, 5))
-        # Affichage des 2 premières dimensions dans le plan
-        plt.subplot(1, 2, 1)
-        # Récupération des poids
-        w = numpy.array(self.weightsmap)
-        # Affichage des poids
-        plt.scatter(w[:, :, 0].flatten(), w[:, :, 1].flatten(), c='k')
-        # Affichage de la grille
-        for i in range(w.shape[0]):
-            plt.plot(w[i, :, 0], w[i, :, 1], 'k', linewidth=1.)
-        for i in range(w.shape[1]):
-            plt.plot(w[:, i, 0], w[:, i, 1], 'k', linewidth=1.)
-        # Affichage des 2 dernières dimensions dans le plan
-        plt.subplot(1, 2, 2)
-        # Récupération des poids
-        w = numpy.array(self.weightsmap)
+        # Création de la figure et des sous graphiques
+        if axes is None:
+            if not interactive:
+                plt.figure(figsize=(10, 5))
+            axes = (plt.subplot(1, 2, 1), plt.subplot(1, 2, 2))
         # Affichage des poids
-        plt.scatter(w[:, :, 2].flatten(), w[:, :, 3].flatten(), c='k')
-        # Affichage de la grille
-        for i in range(w.shape[0]):
-            plt.plot(w[i, :, 2], w[i, :, 3], 'k', linewidth=1.)
-        for i in range(w.shape[1]):
-            plt.plot(w[:, i, 2], w[:, i, 3], 'k', linewidth=1.)
-        # Affichage du titre de la figure
-        plt.suptitle('Poids dans l\'espace d\'entree')
+        draw_weights_2(axes, self.weights_array)
         # Affichage de la figure
         if not interactive:
             plt.show()
@@ -201,16 +498,17 @@ class SOM:
         '''
     @summary: Affichage des poids du réseau (matrice des poids)
     '''
-        # Récupération des poids
-        w = numpy.array(self.weightsmap)
+        # Récupération des poids et de leurs bornes
+        w = self.weights_array
+        wmin, wmax = numpy.min(w), numpy.max(w)
         # Création de la figure
         f, a = plt.subplots(w.shape[0], w.shape[1])
         # Affichage des poids dans un sous graphique (suivant sa position de la SOM)
         for i in range(w.shape[0]):
             for j in range(w.shape[1]):
                 plt.subplot(w.shape[0], w.shape[1], i * w.shape[1] + j + 1)
-                im = plt.imshow(w[i, j].reshape(self.inputsize), interpolation='nearest', vmin=numpy.min(w),
-                                vmax=numpy.max(w), cmap='binary')
+                im = plt.imshow(w[i, j].reshape(self.inputsize), interpolation='nearest', vmin=wmin,
+                                vmax=wmax, cmap='binary')
                 plt.xticks([])
                 plt.yticks([])
         # Affichage de l'échelle
@@ -236,153 +534,246 @@ class SOM:
         for x in X:
             # On calcule la distance à chaque poids de neurone
             self.compute(x.flatten())
-            # On rajoute la distance minimale au carré à la somme
-            s += numpy.min(self.activitymap) ** 2
+            # On rajoute la distance minimale au carré à la somme (la carte d'activité contient déjà les distances au carré)
+            s += numpy.min(self.activitymap)
         # On renvoie l'erreur de quantification vectorielle moyenne
         return s / nsamples
 
-    def get_map_dispertion(self):
-        distanceTotal = 0
-        for i in range(0, len(self.map)):
-            for j in range(0, len(self.map[i])):
-                distanceTotal += self.get_distance_with_neighbor(i, j)
+    def MSE_vec(self, X):
+        '''
+    @summary: Calcul vectorisé de l'erreur de quantification vectorielle moyenne du réseau sur le jeu de données
+    @param X: le jeu de données
+    @type X: numpy array
+    '''
+        # On récupère le nombre d'exemples et on aplatit chacun d'eux
+        nsamples = X.shape[0]
+        X = X.reshape(nsamples, -1).astype(self.weights_array.dtype, copy=False)
+        # Poids des neurones, un neurone par ligne
+        W_flat = self.weights_array.reshape(-1, self.weights_array.shape[-1])
+        # Découpage en paquets d'exemples pour que les distances tiennent dans environ 8 Mo
+        nbytes = nsamples * W_flat.shape[0] * 8
+        # Somme des erreurs quadratiques
+        s = 0
+        for chunk in numpy.array_split(X, max(1, nbytes // (8 << 20))):
+            # Distance au carré de chaque exemple du paquet à chaque poids de neurone
+            d2 = _sqdist(chunk, W_flat)
+            # On rajoute les distances minimales au carré à la somme
+            s += d2.min(axis=1).sum()
+        # On renvoie l'erreur de quantification vectorielle moyenne
+        return s / nsamples
 
-        return distanceTotal
+    def get_map_dispertion(self):
+        '''
+    @summary: Somme des distances au carré (dans l'espace des deux premières dimensions) entre neurones voisins de la carte, chaque paire de voisins étant comptée une fois
+    '''
+        W2 = self.weights_array[..., :2]
+        dx = W2[1:, :] - W2[:-1, :]
+        dy = W2[:, 1:] - W2[:, :-1]
+        return (dx * dx).sum() + (dy * dy).sum()
 
     def get_distance_with_neighbor(self, posx, posy):
+        '''
+    @deprecated: n'est plus utilisée par get_map_dispertion, conservée pour compatibilité
+    '''
+        W = self.weights_array
         distance = 0
         if (posx != 0):
-            #  distance+=abs(self.map[posx-1][posy].posx-self.map[posx][posy].posx)**2+abs(self.map[posx-1][posy].posy-self.map[posx][posy].posy)**2
-            distance += abs(self.map[posx - 1][posy].weights[0] - self.map[posx][posy].weights[0]) ** 2 + abs(
-                self.map[posx - 1][posy].weights[1] - self.map[posx][posy].weights[1]) ** 2
-        elif (posx != len(self.map) - 1):
-            #  distance += abs(self.map[posx][posy].posx - self.map[posx+1][posy].posx) ** 2 + abs(self.map[posx][posy].posy - self.map[posx+1][posy].posy)**2
-            distance += abs(self.map[posx][posy].weights[0] - self.map[posx + 1][posy].weights[0]) ** 2 + abs(
-                self.map[posx][posy].weights[1] - self.map[posx + 1][posy].weights[1]) ** 2
+            a = W[posx - 1, posy, 0] - W[posx, posy, 0]
+            b = W[posx - 1, posy, 1] - W[posx, posy, 1]
+            distance += a * a + b * b
+        elif (posx != self.gridsize[0] - 1):
+            a = W[posx, posy, 0] - W[posx + 1, posy, 0]
+            b = W[posx, posy, 1] - W[posx + 1, posy, 1]
+            distance += a * a + b * b
 
         if (posy != 0):
-            #  distance += abs(self.map[posx][posy-1].posx - self.map[posx][posy].posx) ** 2 + abs(self.map[posx][posy-1].posy - self.map[posx][posy].posy)**2
-            distance += abs(self.map[posx][posy - 1].weights[0] - self.map[posx][posy].weights[0]) ** 2 + abs(
-                self.map[posx][posy - 1].weights[1] - self.map[posx][posy].weights[1]) ** 2
-
-        elif posy != len(self.map[posx]) - 1:
-            #  distance += abs(self.map[posx][posy].posx - self.map[posx][posy+1].posx) ** 2 + abs(self.map[posx][posy].posy - self.map[posx][posy+1].posy) ** 2
-            distance += abs(self.map[posx][posy].weights[0] - self.map[posx][posy + 1].weights[0]) ** 2 + abs(
-                self.map[posx][posy].weights[1] - self.map[posx][posy + 1].weights[1]) ** 2
+            a = W[posx, posy - 1, 0] - W[posx, posy, 0]
+            b = W[posx, posy - 1, 1] - W[posx, posy, 1]
+            distance += a * a + b * b
+
+        elif posy != self.gridsize[1] - 1:
+            a = W[posx, posy, 0] - W[posx, posy + 1, 0]
+            b = W[posx, posy, 1] - W[posx, posy + 1, 1]
+            distance += a * a + b * b
         return distance
     
 
     
-    def find_hand_position_v1(self, map, motrice_position):
-        closest_value=pow(pow(map[0][0].weights[0]-motrice_position[0],2)+pow(map[0][0].weights[1]-motrice_position[1],2),0.5)
-        closest_index=(0,0)
-
-        for i in range(len(map)):
-            for j in range(len(map[i])):
-                if pow(pow((map[i][j].weights[0]-motrice_position[0]),2)+pow((map[i][j].weights[1]-motrice_position[1]),2),0.5)<closest_value:
-                    closest_value=pow(pow((map[i][j].weights[0]-motrice_position[0]),2)+pow((map[i][j].weights[1]-motrice_position[1]),2),0.5)
-                    closest_index=(i,j)
+    def _weights_of(self, map):
+        '''
+    @summary: Récupération du tenseur des poids d'une carte
+    @param map: tenseur des poids (ou, pour compatibilité, carte de neurones)
+    @type map: numpy array ou list
+    @return: tenseur des poids de taille (gx, gy, taille de l'entrée)
+    '''
+        if isinstance(map, numpy.ndarray):
+            return map
+        return numpy.array([[neuron.weights for neuron in line] for line in map])
 
-        return ((map[closest_index[0]][closest_index[1]].weights[0],map[closest_index[0]][closest_index[1]].weights[1]),(map[closest_index[0]][closest_index[1]].weights[2],map[closest_index[0]][closest_index[1]].weights[3]))
+    def _motrice_distances(self, W, motrice_position):
+        '''
+    @summary: Distance au carré entre une position motrice et celle de chaque neurone (la racine ne change pas l'ordre des distances)
+    @param W: tenseur des poids de la carte
+    @type W: numpy array
+    @param motrice_position: position motrice
+    @type motrice_position: tuple
+    @return: carte des distances au carré
+    '''
+        mp0, mp1 = motrice_position
+        a = W[..., 0] - mp0
+        b = W[..., 1] - mp1
+        return a * a + b * b
 
+    def _closest_neurons(self, d2, nb_values):
+        '''
+    @summary: Sélection des nb_values neurones les plus proches (sans trier les autres), triés par distance croissante
+    @param d2: carte des distances au carré
+    @type d2: numpy array
+    @param nb_values: nombre de neurones à sélectionner
+    @type nb_values: int
+    @return: indices à plat des neurones sélectionnés
+    '''
+        flat = d2.ravel()
+        idx = numpy.argpartition(flat, nb_values - 1)[:nb_values]
+        return idx[numpy.argsort(flat[idx])]
 
+    def find_hand_position_v1(self, map, motrice_position):
+        W = self._weights_of(map)
+        d2 = self._motrice_distances(W, motrice_position)
+        i, j = numpy.unravel_index(d2.argmin(), d2.shape)
 
-    def find_hand_position_v2(self, map, motrice_position, nb_values):
-        closest_values=[]
+        return ((W[i, j, 0], W[i, j, 1]), (W[i, j, 2], W[i, j, 3]))
 
-        for i in range(len(map)):
-            for j  in range(len(map[i])):
-                if len(closest_values)<nb_values:
-                    closest_values.append(((i,j),pow(pow(map[i][j].weights[0]-motrice_position[0],2)+pow(map[i][j].weights[1]-motrice_position[1],2),0.5)))
-                    closest_values.sort(key=lambda x: x[1])
-                elif pow(pow(map[i][j].weights[0]-motrice_position[0],2)+pow(map[i][j].weights[1]-motrice_position[1],2),0.5)<closest_values[nb_values-1][1]:
-                    closest_values[nb_values-1]=((i,j),pow(pow(map[i][j].weights[0]-motrice_position[0],2)+pow(map[i][j].weights[1]-motrice_position[1],2),0.5))
-                    closest_values.sort(key=lambda x: x[1])
 
-        result_x=0
-        result_y=0
 
-        for i in range(nb_values):
-            result_x+=map[closest_values[i][0][0]][closest_values[i][0][1]].weights[2]
-            result_y+=map[closest_values[i][0][0]][closest_values[i][0][1]].weights[3]
+    def find_hand_position_v2(self, map, motrice_position, nb_values):
+        W = self._weights_of(map)
+        d2 = self._motrice_distances(W, motrice_position)
+        order = self._closest_neurons(d2, nb_values)
 
-        result_x/=nb_values
-        result_y/=nb_values        
+        # Moyenne des positions de la main des neurones sélectionnés
+        result_x, result_y = W.reshape(-1, W.shape[-1])[order, 2:4].mean(axis=0)
 
-        return ([closest_values[i][0] for i in range(nb_values)],(result_x,result_y))
+        return (list(zip(*numpy.unravel_index(order, d2.shape))), (result_x, result_y))
     
 
-    
-    def find_hand_position_v3(self, map, motrice_position, nb_values):
-        closest_values=[]
 
-        for i in range(len(map)):
-            for j  in range(len(map[i])):
-                if len(closest_values)<nb_values:
-                    closest_values.append(((i,j),pow(pow(map[i][j].weights[0]-motrice_position[0],2)+pow(map[i][j].weights[1]-motrice_position[1],2),0.5)))
-                    closest_values.sort(key=lambda x: x[1])
-                elif pow(pow(map[i][j].weights[0]-motrice_position[0],2)+pow(map[i][j].weights[1]-motrice_position[1],2),0.5)<closest_values[nb_values-1][1]:
-                    closest_values[nb_values-1]=((i,j),pow(pow(map[i][j].weights[0]-motrice_position[0],2)+pow(map[i][j].weights[1]-motrice_position[1],2),0.5))
-                    closest_values.sort(key=lambda x: x[1])
+    def find_hand_position_v3(self, map, motrice_position, nb_values):
+        W = self._weights_of(map)
+        d2 = self._motrice_distances(W, motrice_position)
+        order = self._closest_neurons(d2, nb_values)
 
+        # Pondération des positions de la main par la distance des neurones sélectionnés (seule racine calculée)
+        dists = numpy.sqrt(d2.ravel()[order])
+        weights = (1 - dists / dists.sum()) / (nb_values - 1)
+        result_x, result_y = (W.reshape(-1, W.shape[-1])[order, 2:4] * weights[:, None]).sum(axis=0)
 
-        total_distance=sum(closest_values[i][1] for i in range(nb_values))
+        return (list(zip(*numpy.unravel_index(order, d2.shape))), (result_x, result_y))
     
-        result_x=0
-        result_y=0
 
-        for i in range(nb_values):
-            dist=(1-(closest_values[i][1]/total_distance))/(nb_values-1)
-            result_x+=map[closest_values[i][0][0]][closest_values[i][0][1]].weights[2]*dist
-            result_y+=map[closest_values[i][0][0]][closest_values[i][0][1]].weights[3]*dist
 
-        return ([closest_values[i][0] for i in range(nb_values)],(result_x,result_y))
-    
+    def _trajectory(self, from_pos, to_pos, nb_steps):
+        '''
+    @summary: Calcul des positions motrices intermédiaires d'un mouvement en ligne droite
+    @param from_pos: position motrice de départ
+    @type from_pos: tuple
+    @param to_pos: position motrice d'arrivée
+    @type to_pos: tuple
+    @param nb_steps: nombre de positions (départ et arrivée comprises)
+    @type nb_steps: int
+    @return: tableau des positions de taille (max(nb_steps, 1), 2), la dernière étant toujours la position d'arrivée
+    '''
+        # Avec moins de deux positions, le mouvement se réduit à la position d'arrivée
+        ts = numpy.linspace(0., 1., nb_steps) if nb_steps > 1 else numpy.ones(1)
+        pts = numpy.stack([from_pos[0] + ts * (to_pos[0] - from_pos[0]), from_pos[1] + ts * (to_pos[1] - from_pos[1])], axis=1)
+        pts[-1] = to_pos
+        return pts
 
-    
     def mouvement_v1(self,map, from_pos,to_pos,nb_steps):
+        W=self._weights_of(map)
         hand_steps=[]
-        for index in range(nb_steps-1):
-            x=(from_pos[0]+(index/(nb_steps-1))*(to_pos[0]-from_pos[0]))
-            y=(from_pos[1]+(index/(nb_steps-1))*(to_pos[1]-from_pos[1]))
-            pos_hand=self.find_hand_position_v1(map,(x,y))
-            hand_steps.append((pos_hand[0],pos_hand[1]))
-
-
-        pos_hand=self.find_hand_position_v1(map,(to_pos[0],to_pos[1]))
-        hand_steps.append((pos_hand[0],pos_hand[1]))
+        for p in self._trajectory(from_pos,to_pos,nb_steps):
+            hand_steps.append(self.find_hand_position_v1(W,p))
         
         return hand_steps
     
     def mouvement_v2(self,map, from_pos,to_pos,nb_steps):
+        W=self._weights_of(map)
+        pts=self._trajectory(from_pos,to_pos,nb_steps)
         hand_steps=[]
-        for index in range(nb_steps-1):
-            x=(from_pos[0]+(index/(nb_steps-1))*(to_pos[0]-from_pos[0]))
-            y=(from_pos[1]+(index/(nb_steps-1))*(to_pos[1]-from_pos[1]))
-            pos_hand=self.find_hand_position_v2(map,(x,y),4)
-            hand_steps.append((pos_hand[0],pos_hand[1]))
+        for p in pts[:-1]:
+            hand_steps.append(self.find_hand_position_v2(W,p,4))
 
-
-        pos_hand=self.find_hand_position_v2(map,(to_pos[0],to_pos[1]),3)
-        hand_steps.append((pos_hand[0],pos_hand[1]))
+        # La position d'arrivée est calculée avec 3 voisins
+        hand_steps.append(self.find_hand_position_v2(W,pts[-1],3))
         
         return hand_steps
     
     def mouvement_v3(self,map, from_pos,to_pos,nb_steps):
+        W=self._weights_of(map)
+        pts=self._trajectory(from_pos,to_pos,nb_steps)
         hand_steps=[]
-        for index in range(nb_steps-1):
-            x=(from_pos[0]+(index/(nb_steps-1))*(to_pos[0]-from_pos[0]))
-            y=(from_pos[1]+(index/(nb_steps-1))*(to_pos[1]-from_pos[1]))
-            pos_hand=self.find_hand_position_v3(map,(x,y),4)
-            hand_steps.append((pos_hand[0],pos_hand[1]))
-
+        for p in pts[:-1]:
+            hand_steps.append(self.find_hand_position_v3(W,p,4))
 
-        pos_hand=self.find_hand_position_v3(map,(to_pos[0],to_pos[1]),3)
-        hand_steps.append((pos_hand[0],pos_hand[1]))
+        # La position d'arrivée est calculée avec 3 voisins
+        hand_steps.append(self.find_hand_position_v3(W,pts[-1],3))
         
         return hand_steps
 
 
+    def mouvement_batch(self, map, from_pos, to_pos, nb_steps, method='v1', k=4, k_last=3):
+        '''
+    @summary: Calcul des positions de la main le long d'un mouvement en traitant toutes les positions motrices en une fois
+    @param map: carte de neurones ou tenseur des poids
+    @type map: list ou numpy array
+    @param from_pos: position motrice de départ
+    @type from_pos: tuple
+    @param to_pos: position motrice d'arrivée
+    @type to_pos: tuple
+    @param nb_steps: nombre de positions (départ et arrivée comprises ; avec moins de deux positions, seule l'arrivée est calculée)
+    @type nb_steps: int
+    @param method: méthode de calcul de la position de la main ('v1', 'v2' ou 'v3', comme find_hand_position_v*)
+    @type method: str
+    @param k: nombre de voisins utilisés par les méthodes 'v2' et 'v3'
+    @type k: int
+    @param k_last: nombre de voisins utilisés par les méthodes 'v2' et 'v3' pour la position d'arrivée (3, comme mouvement_v2 et mouvement_v3)
+    @type k_last: int
+    @return: liste des positions, identique à celle de mouvement_v* avec les valeurs par défaut de k et k_last
+    '''
+        if method not in ('v1', 'v2', 'v3'):
+            raise ValueError("Méthode inconnue : " + str(method))
+        W = self._weights_of(map)
+        pts = self._trajectory(from_pos, to_pos, nb_steps)
+        Wf = W.reshape(-1, W.shape[-1])
+        if method == 'v1':
+            # Distance au carré entre chaque position motrice et celle de chaque neurone
+            flat = _sqdist(pts, Wf[:, :2])
+            return [((w[0], w[1]), (w[2], w[3])) for w in Wf[flat.argmin(axis=1)]]
+        hand_steps = []
+        if len(pts) > 1:
+            # Distance au carré entre chaque position motrice (sauf l'arrivée) et celle de chaque neurone
+            flat = _sqdist(pts[:-1], Wf[:, :2])
+            # Sélection des k neurones les plus proches de chaque position, triés par distance croissante
+            idx = numpy.argpartition(flat, k - 1, axis=1)[:, :k]
+            order = numpy.take_along_axis(idx, numpy.argsort(numpy.take_along_axis(flat, idx, axis=1), axis=1), axis=1)
+            hands = Wf[order, 2:4]
+            if method == 'v2':
+                result = hands.mean(axis=1)
+            else:
+                dists = numpy.sqrt(numpy.take_along_axis(flat, order, axis=1))
+                weights = (1 - dists / dists.sum(axis=1, keepdims=True)) / (k - 1)
+                result = (hands * weights[..., None]).sum(axis=1)
+            ix, iy = numpy.unravel_index(order, W.shape[:2])
+            hand_steps = [(list(zip(ix[n], iy[n])), (result[n, 0], result[n, 1])) for n in range(len(pts) - 1)]
+        # La position d'arrivée est calculée avec k_last voisins
+        if method == 'v2':
+            hand_steps.append(self.find_hand_position_v2(W, pts[-1], k_last))
+        else:
+            hand_steps.append(self.find_hand_position_v3(W, pts[-1], k_last))
+        return hand_steps
+
+
 # -----------------------------------------------------------------------------
 if __name__ == '__main__':
     # os.curdir
@@ -404,6 +795,8 @@ if __name__ == '__main__':
     VERBOSE = True
     # Nombre de pas de temps avant rafraissichement de l'affichage
     NAFFICHAGE = 1000 # Par défaut à 1000
+    # Nombre d'exemples par pas de temps d'apprentissage (1 pour l'apprentissage en ligne, sinon par mini-lots)
+    BATCH = 1 # Par défaut à 1
     # DONNÉES D'APPRENTISSAGE
     # Nombre de données à générer pour les ensembles 1, 2 et 3
     # TODO décommenter les données souhaitées
@@ -482,37 +875,83 @@ if __name__ == '__main__':
     network.plot()
     # Initialisation de l'affichage interactif
     if VERBOSE:
-        # Création d'une figure
-        plt.figure(figsize=(10, 5))
+        # Création d'une figure et de ses deux sous graphiques, réutilisés à chaque rafraîchissement
+        fig, axes = plt.subplots(1, 2, figsize=(10, 5))
         # Mode interactif
         plt.ion()
         # Affichage de la figure
         plt.show()
-    # Boucle d'apprentissage
-    for i in range(N + 1):
-        # Choix d'un exemple aléatoire pour l'entrée courante
-        index = numpy.random.randint(nsamples)
-        x = samples[index].flatten()
-        # Calcul de l'activité du réseau
-        network.compute(x)
-        # Modification des poids du réseau
-        network.learn(ETA, SIGMA, x)
+        # Les images de l'évolution du réseau sont rendues et enregistrées par un fil d'exécution dédié,
+        # à partir de copies des poids, pour ne pas bloquer l'apprentissage
+        snapshots = queue.Queue(maxsize=2)
+        # Erreurs rencontrées lors de l'enregistrement (relancées à la fin de l'apprentissage)
+        snapshot_errors = []
+
+        def save_snapshots():
+            while True:
+                w, step = snapshots.get()
+                if w is None:
+                    break
+                # Une erreur n'arrête pas le fil d'exécution, qui continue à vider la file
+                try:
+                    save_weights_2(w, "generatedImage/" + str(step) + ".png")
+                except Exception as e:
+                    snapshot_errors.append(e)
+
+        def put_snapshot(item):
+            # On ne bloque jamais l'apprentissage sur un fil d'exécution d'enregistrement arrêté
+            while writer.is_alive():
+                try:
+                    snapshots.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        writer = threading.Thread(target=save_snapshots, daemon=True)
+        writer.start()
+    # Exemples aplatis une fois pour toutes
+    samples_flat = numpy.ascontiguousarray(samples.reshape(nsamples, -1), dtype=numpy.float32)
+    # Tirage à l'avance des indices des exemples de chaque pas de temps
+    idxs = numpy.random.randint(nsamples, size=(N + 1, BATCH))
+    # Compilation du noyau d'apprentissage avant la boucle (sur une copie des poids)
+    if NUMBA:
+        _som_train(network.weights_array.copy(), samples_flat, idxs[:1, 0], ETA, network.neighborhood_table(SIGMA))
+    # Boucle d'apprentissage, par paquets de pas de temps entre deux mises à jour de l'affichage
+    start = 0
+    for i in range(0, N + 1, NAFFICHAGE):
+        # Modification des poids du réseau jusqu'au pas de temps i inclus
+        network.train(samples_flat, idxs[start:i + 1], ETA, SIGMA)
+        start = i + 1
         # Mise à jour de l'affichage
-        if VERBOSE and i % NAFFICHAGE == 0:
-            # Effacement du contenu de la figure
-            plt.clf()
-            # Remplissage de la figure
-            # TODO à remplacer par scatter_plot_2 pour les données robotiques
-            network.scatter_plot_2(True)
-            # Affichage du contenu de la figure
-            plt.pause(0.00001)
-            plt.draw()
-            plt.savefig("generatedImage/" + str(i) + ".png")
+        if VERBOSE:
+            w = network.weights_array.copy()
+            # Enregistrement de l'image en arrière-plan
+            put_snapshot((w, i))
+            # Rafraîchissement de la fenêtre interactive
+            for ax in axes:
+                ax.clear()
+            draw_weights_2(axes, w)
+            fig.canvas.draw_idle()
+            fig.canvas.flush_events()
+    # Derniers pas de temps
+    network.train(samples_flat, idxs[start:], ETA, SIGMA)
     # Fin de l'affichage interactif
     if VERBOSE:
+        # Attente de l'enregistrement des dernières images
+        put_snapshot((None, None))
+        writer.join()
+        if snapshot_errors:
+            raise snapshot_errors[0]
+        # Affichage de l'état final du réseau
+        for ax in axes:
+            ax.clear()
+        # TODO à remplacer par scatter_plot_2 pour les données robotiques
+        network.scatter_plot_2(True, axes)
+        plt.pause(0.00001)
+        plt.draw()
     
         # Désactivation du mode interactif
-        result=network.find_hand_position_v1(network.map, motrice_test_position)
+        result=network.find_hand_position_v1(network.weights_array, motrice_test_position)
 
         plt.subplot(1, 2, 1)
         plt.scatter(samples[:,0,0].flatten(),samples[:,1,0].flatten(),c='lightgray',s=10)
@@ -528,7 +967,7 @@ if __name__ == '__main__':
         plt.pause(2)
 
         
-        result2=network.find_hand_position_v2(network.map, motrice_test_position,4)
+        result2=network.find_hand_position_v2(network.weights_array, motrice_test_position,4)
 
         plt.clf()
         network.scatter_plot_2(True)
@@ -536,7 +975,7 @@ if __name__ == '__main__':
         plt.scatter(samples[:,0,0].flatten(),samples[:,1,0].flatten(),c='lightgray',s=10)
         plt.scatter(motrice_test_position[0],motrice_test_position[1],c='green')
         for i in range(4):
-            plt.scatter(network.map[result2[0][i][0]][result2[0][i][1]].weights[0],network.map[result2[0][i][0]][result2[0][i][1]].weights[1],c='red')
+            plt.scatter(network.weights_array[result2[0][i][0],result2[0][i][1],0],network.weights_array[result2[0][i][0],result2[0][i][1],1],c='red')
         plt.subplot(1, 2, 2)
         plt.scatter(samples[:,2,0].flatten(),samples[:,3,0].flatten(),c='lightgray',s=10)
         plt.scatter(ideal[0],ideal[1],c='green')
@@ -547,7 +986,7 @@ if __name__ == '__main__':
         plt.pause(2)
 
 
-        result3=network.find_hand_position_v3(network.map, motrice_test_position,4)
+        result3=network.find_hand_position_v3(network.weights_array, motrice_test_position,4)
 
         plt.clf()
         network.scatter_plot_2(True)
@@ -555,7 +994,7 @@ if __name__ == '__main__':
         plt.scatter(samples[:,0,0].flatten(),samples[:,1,0].flatten(),c='lightgray',s=10)
         plt.scatter(motrice_test_position[0],motrice_test_position[1],c='green')
         for i in range(4):
-            plt.scatter(network.map[result3[0][i][0]][result3[0][i][1]].weights[0],network.map[result3[0][i][0]][result3[0][i][1]].weights[1],c='red')
+            plt.scatter(network.weights_array[result3[0][i][0],result3[0][i][1],0],network.weights_array[result3[0][i][0],result3[0][i][1],1],c='red')
         plt.subplot(1, 2, 2)
         plt.scatter(samples[:,2,0].flatten(),samples[:,3,0].flatten(),c='lightgray',s=10)
         plt.scatter(ideal[0],ideal[1],c='green')
@@ -587,7 +1026,7 @@ if __name__ == '__main__':
         #pos2=(numpy.random.rand()*2.5+0.5,numpy.random.rand()*2.5+0.5)
         pos1=(1,1)
         pos2=(2.5,2.5)
-        result4=network.mouvement_v1(network.map, pos1,pos2,10)
+        result4=network.mouvement_batch(network.weights_array, pos1,pos2,10)
 
         plt.clf()
         network.scatter_plot_2(True)
@@ -603,7 +1042,7 @@ if __name__ == '__main__':
         plt.pause(2)
 
 
-        result5=network.mouvement_v2(network.map, pos1,pos2,10)
+        result5=network.mouvement_v2(network.weights_array, pos1,pos2,10)
 
         plt.clf()
         network.scatter_plot_2(True)
@@ -619,7 +1058,7 @@ if __name__ == '__main__':
         plt.pause(2)
         
         
-        result6=network.mouvement_v3(network.map, pos1,pos2,10)
+        result6=network.mouvement_v3(network.weights_array, pos1,pos2,10)
 
         plt.clf()
         network.scatter_plot_2(True)
@@ -669,24 +1108,24 @@ if __name__ == '__main__':
     # print(f"Distance à l'idéal: {abs(ideal[0]-result2[0])+abs(ideal[1]-result2[1])}")
     # print()
 
-    #result3=network.find_hand_position_v2(network.map, motrice_test_position,3)
+    #result3=network.find_hand_position_v2(network.weights_array, motrice_test_position,3)
     # print(f"Position calculé 3: {result3[0]}:{result3[1]}")
     # print(f"Distance à l'idéal: {abs(ideal[0]-result3[0])+abs(ideal[1]-result3[1])}")
     # print()
 
-    #result4=network.find_hand_position_v3(network.map, motrice_test_position,5)
+    #result4=network.find_hand_position_v3(network.weights_array, motrice_test_position,5)
     # print(f"Position calculé 4: {result4[0]}:{result4[1]}")
     # print(f"Distance à l'idéal: {abs(ideal[0]-result4[0])+abs(ideal[1]-result4[1])}")
     # print()
 
-    #result5=network.find_hand_position_v3(network.map, motrice_test_position,3)
+    #result5=network.find_hand_position_v3(network.weights_array, motrice_test_position,3)
     # print(f"Position calculé 5: {result5[0]}:{result5[1]}")
     # print(f"Distance à l'idéal: {abs(ideal[0]-result5[0])+abs(ideal[1]-result5[1])}")
     # print()
 
-    print(str(pow(pow(ideal[0]-result[1][0],2)+pow(ideal[1]-result[1][1],2),0.5)).replace('.',',').replace('[','').replace(']',''))
-    print(str(pow(pow(ideal[0]-result2[1][0],2)+pow(ideal[1]-result2[1][1],2),0.5)).replace('.',',').replace('[','').replace(']',''))
-    print(str(pow(pow(ideal[0]-result3[1][0],2)+pow(ideal[1]-result3[1][1],2),0.5)).replace('.',',').replace('[','').replace(']',''))
+    print(str(numpy.hypot(ideal[0]-result[1][0],ideal[1]-result[1][1])).replace('.',',').replace('[','').replace(']',''))
+    print(str(numpy.hypot(ideal[0]-result2[1][0],ideal[1]-result2[1][1])).replace('.',',').replace('[','').replace(']',''))
+    print(str(numpy.hypot(ideal[0]-result3[1][0],ideal[1]-result3[1][1])).replace('.',',').replace('[','').replace(']',''))
 
     # begin=(numpy.random.rand()*numpy.pi,numpy.random.rand()*numpy.pi)
     # end=(numpy.random.rand()*numpy.pi,numpy.random.rand()*numpy.pi)
@@ -696,9 +1135,9 @@ if __name__ == '__main__':
 
     # result6=network.mouvement_v1(network.map,begin,end,25)
 
-    # result7=network.mouvement_v2(network.map,begin,end,25)
+    # result7=network.mouvement_v2(network.weights_array,begin,end,25)
 
-    # result8=network.mouvement_v3(network.map,begin,end,25)
+    # result8=network.mouvement_v3(network.weights_array,begin,end,25)
 
     # Affichage des données (pour l'ensemble robotique)
     # plt.figure()
@@ -733,5 +1172,5 @@ if __name__ == '__main__':
     #plt.show()
 
     # Affichage de l'erreur de quantification vectorielle moyenne après apprentissage
-    print("erreur de quantification vectorielle moyenne ", network.MSE(samples))
+    print("erreur de quantification vectorielle moyenne ", network.MSE_vec(samples))
     print("coef de relachement ", network.get_map_dispertion())
\ No newline at end of file